@@ -1,7 +1,7 @@
 import json
 import os
 import shutil
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Optional, Union
 
 import openai
 import pandas as pd
@@ -9,8 +9,11 @@ import tiktoken
 from pandasai import PandasAI
 from pandasai.llm.openai import OpenAI
 
+from f1.answers import ANSWER_TEMPLATES, FINAL_ANSWER_PARAMETER
 from f1.helpers import generate_schemas
-from f1.prompts import SYSTEM_CONTENT, response_too_long_prompt
+from f1.prefetch import Prefetcher
+from f1.prompts import response_too_long_prompt, system_content
+from f1.registry import DataFrameRegistry
 
 
 class FormulaOneAI:
@@ -19,6 +22,8 @@ class FormulaOneAI:
         api_key: Optional[str],
         funcs: list[Callable[..., Any]],
         gpt_model: str = "gpt-3.5-turbo-0613",
+        prefetch: bool = False,
+        fast_answers: bool = False,
     ):
         if api_key is None:
             raise RuntimeError("API Key given is null")
@@ -32,16 +37,32 @@ class FormulaOneAI:
         functions = funcs.copy()
         functions.append(self.data_analysis)
         functions.append(self.create_chart)
+        functions.append(self.join_dataframes)
 
         # Generate schemas for GPT and function mappings
         self.function_schema = generate_schemas(functions)
         self.function_mapping = {func.__name__: func for func in functions}
 
-        # Keep track of last called function, last returned dataframe, and last returned function response
+        # Let GPT mark simple lookups as the final answer, so they can be rendered
+        # from a template instead of another chat completion
+        self.fast_answers = fast_answers
+        if self.fast_answers:
+            for schema in self.function_schema:
+                if schema["name"] in ANSWER_TEMPLATES:
+                    schema["parameters"]["properties"][
+                        "final_answer"
+                    ] = FINAL_ANSWER_PARAMETER
+
+        # Number of chat completions skipped by answering from a template
+        self.round_trips_saved = 0
+
+        # Keep track of last called function and last returned function response
         self.last_called_function: str = ""
-        self.last_returned_df: pd.DataFrame = pd.DataFrame({})
         self.last_returned_function_response: Any = None
 
+        # Keep every returned dataframe under a handle GPT can refer back to
+        self.dataframes = DataFrameRegistry()
+
         # Create PandasAI object
         llm = OpenAI(api_token=self.api_key)
         self.pandas_ai = PandasAI(
@@ -54,6 +75,11 @@ class FormulaOneAI:
         # Keep track of executed functions for each .ask() call
         self.executed_functions: list[str] = []
 
+        # Optionally warm the cache for the calls the model is likely to make next
+        self.prefetcher: Optional[Prefetcher] = None
+        if prefetch:
+            self.prefetcher = Prefetcher(self.function_mapping)
+
     def ask(self, prompt):
         # Delete old graphs
         self._delete_all_graphs("f1/exports/charts")
@@ -62,7 +88,9 @@ class FormulaOneAI:
         self.executed_functions = []
 
         # Add initial conversation messages
-        self.messages = [{"role": "system", "content": SYSTEM_CONTENT}]
+        self.messages = [
+            {"role": "system", "content": system_content(self.fast_answers)}
+        ]
         self.messages.append({"role": "user", "content": prompt})
 
         response = self._chat_completion()
@@ -70,8 +98,15 @@ class FormulaOneAI:
 
         while response.get("function_call"):
             function_name, kwargs = self._parse_response(response)
+            final_answer = kwargs.pop("final_answer", False)
             func = self.function_mapping[function_name]
+            if self.prefetcher:
+                self.prefetcher.record_call(function_name, kwargs)
             function_response = func(**kwargs)
+            if self.prefetcher:
+                self.prefetcher.observe(
+                    function_name, kwargs, function_response, prompt
+                )
 
             # Save function call
             function_call = self._stringify_function_call(function_name, kwargs)
@@ -81,45 +116,53 @@ class FormulaOneAI:
             self.last_called_function = function_name
             self.last_returned_function_response = function_response
 
+            handle = ""
             if isinstance(function_response, pd.DataFrame):
-                self.last_returned_df = function_response
+                handle = self.dataframes.add(function_response)
+
+            if final_answer:
+                answer = self._template_answer(function_name, kwargs, function_response)
+                if answer is not None:
+                    self.round_trips_saved += 1
+                    self.messages.append({"role": "assistant", "content": answer})
+                    return answer
 
             serialized_response = self._serialize_response(function_response)
 
-            self._add_function_response(serialized_response)
+            self._add_function_response(serialized_response, handle)
 
             response = self._chat_completion()
             self.messages.append(response)  # extend conversation with assistant's reply
 
         return response["content"]
 
-    def data_analysis(self, prompt: str) -> Any:
-        """Function that can run data analysis on a pd.DataFrame.
+    def data_analysis(self, prompt: str, handles: Optional[list[str]] = None) -> Any:
+        """Function that can run data analysis on one or more pd.DataFrames.
 
         This function cannot fetch any data. It can only be called after getting
         data from another function first.
 
-        This function has access to the most recently returned pd.DataFrame.
+        Every returned pd.DataFrame has a handle (e.g. "df1"). If no handles are
+        given, this function uses the most recently returned pd.DataFrame.
 
         Args:
             prompt (str): The prompt to run the data analysis. The prompt will take the
             form of natural language (e.g. if you want to find a driver_id from driver info,
             then you can have the prompt as, "Get me the driver_id of driver x from the dataframe")
+            handles (list[str]): The handles of the dataframes to analyse. Not required
         Return:
             Any: The response to the prompt.
         """
-        if self.last_returned_df.empty:
-            raise RuntimeError("Empty pd.DataFrame being given to PandasAI")
-
-        return self.pandas_ai(self.last_returned_df, prompt)
+        return self.pandas_ai(self._get_dataframes(handles), prompt)
 
-    def create_chart(self, prompt: str) -> Any:
+    def create_chart(self, prompt: str, handles: Optional[list[str]] = None) -> Any:
         """Function that can create plots or graphs.
 
         This function cannot fetch any data. It can only be called after getting
         data from another function first.
 
-        This function has access to the most recently returned pd.DataFrame.
+        Every returned pd.DataFrame has a handle (e.g. "df1"). If no handles are
+        given, this function uses the most recently returned pd.DataFrame.
 
         The chart(s) will be saved and displayed to the user in the application. Your
         response after this function should mention that the graph has been created and
@@ -129,12 +172,79 @@ class FormulaOneAI:
             prompt (str): The prompt to create the plots or graphs. The prompt will take
             the form of natural language (e.g. if you want to graph driver finishing position,
             then you can have the prompt as, "Plot the driver finishing position.")
+            handles (list[str]): The handles of the dataframes to plot. Not required
         Return:
             Any: The response to the prompt.
         """
-        if self.last_returned_df.empty:
+        return self.pandas_ai(self._get_dataframes(handles), prompt)
+
+    def join_dataframes(
+        self,
+        left: str,
+        right: str,
+        on: list[str],
+        right_on: Optional[list[str]] = None,
+        how: str = "inner",
+    ) -> pd.DataFrame:
+        """Function that joins two previously returned pd.DataFrames into a new one.
+
+        This function cannot fetch any data. Use it to combine datasets (e.g. race
+        results and qualifying results of the same round) without fetching them again.
+        The joined pd.DataFrame gets its own handle.
+
+        Args:
+            left (str): The handle of the left dataframe (e.g. "df1")
+            right (str): The handle of the right dataframe (e.g. "df2")
+            on (list[str]): The columns of the left dataframe to join on
+            right_on (list[str]): The columns of the right dataframe to join on, if
+                they are named differently from `on`. Not required
+            how (str): The type of join, one of ("inner", "left", "right", "outer").
+                Not required
+        Return:
+            pd.DataFrame: The joined dataframe
+        """
+        if how not in ("inner", "left", "right", "outer"):
+            raise RuntimeError(f"Unsupported join type: {how}")
+
+        return pd.merge(
+            self.dataframes.get(left),
+            self.dataframes.get(right),
+            how=how,
+            left_on=on,
+            right_on=right_on or on,
+            suffixes=(f"_{left}", f"_{right}"),
+        )
+
+    def _get_dataframes(
+        self, handles: Optional[list[str]]
+    ) -> Union[pd.DataFrame, list[pd.DataFrame]]:
+        """Get the dataframes to give to PandasAI"""
+        if not handles:
+            dataframes = [self.dataframes.get()]
+        else:
+            dataframes = [self.dataframes.get(handle) for handle in handles]
+
+        if any(df.empty for df in dataframes):
             raise RuntimeError("Empty pd.DataFrame being given to PandasAI")
-        return self.pandas_ai(self.last_returned_df, prompt)
+
+        if len(dataframes) == 1:
+            return dataframes[0]
+        return dataframes
+
+    def _template_answer(
+        self, function_name: str, kwargs: dict[str, Any], function_response: Any
+    ) -> Optional[str]:
+        """Render the final answer locally from the function's answer template.
+
+        Returns None if the answer cannot be rendered, in which case GPT writes
+        the answer as usual."""
+        if not self.fast_answers or function_name not in ANSWER_TEMPLATES:
+            return None
+        if not isinstance(function_response, pd.DataFrame) or function_response.empty:
+            return None
+
+        template = ANSWER_TEMPLATES[function_name]
+        return template(kwargs, function_response)
 
     def _stringify_function_call(
         self, function_name: str, kwargs: dict[str, Any]
@@ -156,10 +266,11 @@ class FormulaOneAI:
             # Delete each subdirectory
             shutil.rmtree(subdir)
 
-    def _add_function_response(self, serialized_response: str) -> None:
+    def _add_function_response(self, serialized_response: str, handle: str) -> None:
         """Create a response for GPT after receiving the function response.
 
-        Add the response to the conversation."""
+        If the response is a dataframe, `handle` is the handle it was stored
+        under. Add the response to the conversation."""
         function_response = self.last_returned_function_response
         function_name = self.last_called_function
 
@@ -175,7 +286,7 @@ class FormulaOneAI:
                     f"Function was too long to return. Type: {response_type}"
                 )
 
-            content = response_too_long_prompt(function_name, function_response)
+            content = response_too_long_prompt(function_name, function_response, handle)
             # extend conversation with custom user response
             self.messages.append(
                 {
@@ -184,6 +295,10 @@ class FormulaOneAI:
                 }
             )
         else:
+            if handle:
+                serialized_response = (
+                    f'{{"handle": "{handle}", "data": {serialized_response}}}'
+                )
             # extend conversation with function response
             self.messages.append(
                 {
@@ -0,0 +1,69 @@
+from typing import Any, Callable
+
+import pandas as pd
+
+AnswerTemplate = Callable[[dict[str, Any], pd.DataFrame], str]
+
+# Added to the schema of every function that has an answer template
+FINAL_ANSWER_PARAMETER = {
+    "type": "boolean",
+    "description": (
+        "Set to true if the result of this call fully answers the question "
+        "on its own. The result will then be shown to the user directly."
+    ),
+}
+
+
+def markdown_table(df: pd.DataFrame) -> str:
+    """Render a dataframe as a markdown table"""
+    header = "| " + " | ".join(str(col) for col in df.columns) + " |"
+    separator = "| " + " | ".join("---" for _ in df.columns) + " |"
+    rows = [
+        "| " + " | ".join("" if pd.isna(x) else str(x) for x in row) + " |"
+        for row in df.itertuples(index=False)
+    ]
+    return "\n".join([header, separator, *rows])
+
+
+def _after_round(kwargs: dict[str, Any]) -> str:
+    round = kwargs.get("round")
+    return f" after round {round}" if round else ""
+
+
+def race_result_answer(kwargs: dict[str, Any], df: pd.DataFrame) -> str:
+    winner = df.iloc[0]
+    return (
+        f"{winner['first_name']} {winner['last_names']} won round {kwargs['round']} "
+        f"of the {kwargs['season']} season.\n\n{markdown_table(df)}"
+    )
+
+
+def race_qualifying_answer(kwargs: dict[str, Any], df: pd.DataFrame) -> str:
+    pole = df.iloc[0]
+    return (
+        f"{pole['first_name']} {pole['last_names']} ({pole['constructors']}) took "
+        f"pole position for round {kwargs['round']} of the {kwargs['season']} "
+        f"season.\n\n{markdown_table(df)}"
+    )
+
+
+def driver_standings_answer(kwargs: dict[str, Any], df: pd.DataFrame) -> str:
+    return (
+        f"Driver standings for the {kwargs['season']} season{_after_round(kwargs)}:"
+        f"\n\n{markdown_table(df)}"
+    )
+
+
+def constructors_standings_answer(kwargs: dict[str, Any], df: pd.DataFrame) -> str:
+    return (
+        f"Constructor standings for the {kwargs['season']} season"
+        f"{_after_round(kwargs)}:\n\n{markdown_table(df)}"
+    )
+
+
+ANSWER_TEMPLATES: dict[str, AnswerTemplate] = {
+    "get_race_result": race_result_answer,
+    "get_race_qualifying": race_qualifying_answer,
+    "get_driver_standings": driver_standings_answer,
+    "get_constructors_standings": constructors_standings_answer,
+}
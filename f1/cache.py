@@ -0,0 +1,180 @@
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Hashable, Optional
+
+import pandas as pd
+
+CacheKey = tuple[str, tuple[tuple[str, Hashable], ...]]
+
+
+class FunctionCache:
+    """Thread-safe LRU cache for the results of the F1 data functions.
+
+    Entries expire after `ttl` seconds, or after `current_season_ttl` seconds
+    for the current season (and for all-time data, which includes it), so that
+    data for a season that is still in progress gets refreshed. Concurrent
+    calls for the same key share a single fetch, which lets a background
+    prefetch and a foreground call for the same data wait on each other
+    instead of both hitting the API."""
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = 600.0,
+        current_season_ttl: Optional[float] = 60.0,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.current_season_ttl = current_season_ttl
+        self._entries: OrderedDict[
+            CacheKey, tuple[Any, Optional[float]]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: dict[CacheKey, threading.Lock] = {}
+
+    def key(
+        self, func: Callable[..., Any], args: tuple[Any, ...], kwargs: dict[str, Any]
+    ) -> CacheKey:
+        """Build a cache key that is the same however the arguments are passed"""
+        bound = inspect.signature(func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = tuple(
+            (name, tuple(value) if isinstance(value, list) else value)
+            for name, value in bound.arguments.items()
+        )
+        return func.__name__, arguments
+
+    def get(self, key: CacheKey) -> tuple[bool, Any]:
+        with self._lock:
+            if not self._is_fresh(key):
+                return False, None
+
+            self._entries.move_to_end(key)
+            value, expires_at = self._entries[key]
+
+        if isinstance(value, LazyValue):
+            # Build the value without holding the lock, so other reads are not
+            # blocked while it is decoded
+            lazy_value = value
+            value = lazy_value.load()
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] is lazy_value:
+                    self._entries[key] = (value, expires_at)
+
+        return True, _copy(value)
+
+    def put(self, key: CacheKey, value: Any, ttl: Optional[float] = -1.0) -> None:
+        """Store a value. Passing `ttl=None` keeps the entry until it is evicted,
+        leaving `ttl` out uses the cache default."""
+        self._store(key, _copy(value), ttl)
+
+    def put_lazy(
+        self, key: CacheKey, loader: Callable[[], Any], ttl: Optional[float] = None
+    ) -> None:
+        """Store a value that is only built by calling `loader` the first time
+        it is requested"""
+        self._store(key, LazyValue(loader), ttl)
+
+    def keys(self) -> list[CacheKey]:
+        with self._lock:
+            return [key for key in list(self._entries) if self._is_fresh(key)]
+
+    def _store(self, key: CacheKey, value: Any, ttl: Optional[float]) -> None:
+        if ttl is not None and ttl < 0:
+            ttl = self._default_ttl(key)
+        expires_at = None if ttl is None else time.monotonic() + ttl
+
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, key: CacheKey) -> bool:
+        with self._lock:
+            return self._is_fresh(key)
+
+    def call(
+        self, func: Callable[..., Any], args: tuple[Any, ...], kwargs: dict[str, Any]
+    ) -> Any:
+        key = self.key(func, args, kwargs)
+        hit, value = self.get(key)
+        if hit:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another thread may have fetched this while we were waiting
+            try:
+                hit, value = self.get(key)
+                if hit:
+                    return value
+
+                value = func(*args, **kwargs)
+                self.put(key, value)
+            finally:
+                # Also drop the lock when the call fails, e.g. for a round
+                # that does not exist
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _default_ttl(self, key: CacheKey) -> Optional[float]:
+        season = dict(key[1]).get("season")
+        if isinstance(season, int) and (season == 0 or season >= date.today().year):
+            return self.current_season_ttl
+        return self.ttl
+
+    def _is_fresh(self, key: CacheKey) -> bool:
+        """Check that a key is cached and not expired. Caller holds `_lock`."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+
+        _, expires_at = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._entries[key]
+            return False
+        return True
+
+
+class LazyValue:
+    """A cached value that has not been built yet"""
+
+    def __init__(self, loader: Callable[[], Any]):
+        self.load = loader
+
+
+def _copy(value: Any) -> Any:
+    """DataFrames are mutable, so never hand out the cached object itself"""
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    return value
+
+
+function_cache = FunctionCache()
+
+
+def cached(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Decorator that stores the results of an F1 data function in `function_cache`.
+
+    `functools.wraps` keeps the name, docstring and signature of the wrapped
+    function, so the generated GPT function schemas are unchanged."""
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return function_cache.call(func, args, kwargs)
+
+    return wrapper
@@ -1,12 +1,24 @@
-from typing import Any, Callable
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Optional
 
 import pandas as pd
 import requests
 
+from f1.cache import cached
+
 BASE_URL = "http://ergast.com/api/f1"
 
+# Ergast will not return more than 1000 rows in a single page
+MAX_PAGE_LIMIT = 1000
+
+# Seconds to wait for Ergast before giving up on a request
+REQUEST_TIMEOUT = 10
+
 
 # Standings functions
+@cached
 def get_driver_standings(season: int, round: int = 0) -> pd.DataFrame:
     """Get the driver standings at the end of a specific season or
     after a specific round in a season. If the round parameter is not
@@ -28,7 +40,7 @@ def get_driver_standings(season: int, round: int = 0) -> pd.DataFrame:
     else:
         url = f"{BASE_URL}/{season}/driverStandings.json"
 
-    response = requests.get(url)
+    response = requests.get(url, timeout=REQUEST_TIMEOUT)
     data = response.json()
     drivers = data["MRData"]["StandingsTable"]["StandingsLists"][0]["DriverStandings"]
 
@@ -43,6 +55,7 @@ def get_driver_standings(season: int, round: int = 0) -> pd.DataFrame:
     return driver_standings
 
 
+@cached
 def get_constructors_standings(season: int, round: int = 0) -> pd.DataFrame:
     """Get the constructor standings at the end of a specific season or
     after a specific round in a season. If the round parameter is not
@@ -64,7 +77,7 @@ def get_constructors_standings(season: int, round: int = 0) -> pd.DataFrame:
     else:
         url = f"{BASE_URL}/{season}/constructorStandings.json"
 
-    response = requests.get(url)
+    response = requests.get(url, timeout=REQUEST_TIMEOUT)
     data = response.json()
     constructors = data["MRData"]["StandingsTable"]["StandingsLists"][0][
         "ConstructorStandings"
@@ -81,6 +94,199 @@ def get_constructors_standings(season: int, round: int = 0) -> pd.DataFrame:
     return constructors_standings
 
 
+def get_standings_progression(season: int) -> pd.DataFrame:
+    """Get the driver standings after every round of a season in a single
+    call. Use this function instead of calling get_driver_standings once per
+    round, e.g. when charting how the championship developed over a season.
+
+    This function is only available from the 1991 season onwards. Before 1991
+    only a driver's best results counted towards the championship, so use
+    get_driver_standings for earlier seasons.
+
+    Args:
+        season (int): used to specify the year in which
+            to fetch the standings progression
+    Returns:
+        pd.DataFrame: a dataframe with one row per driver per round, showing
+        the round, the driver_id, the driver last name, the total points after
+        that round, and the championship position after that round. Drivers
+        only appear from the first round they took part in.
+    """
+    if season <= LAST_DROPPED_SCORES_SEASON:
+        raise RuntimeError(
+            f"Standings progression is not available before "
+            f"{LAST_DROPPED_SCORES_SEASON + 1}, use get_driver_standings instead"
+        )
+
+    # Only hold the lock of this season while fetching, so a slow season
+    # does not block the others
+    with _progression_lock:
+        progression = _progression_cache.setdefault(season, _SeasonPoints())
+        season_lock = _progression_season_locks.setdefault(season, threading.Lock())
+
+    with season_lock:
+        if progression.is_stale():
+            progression.update(season)
+        rows = progression.rows.copy()
+
+    if rows.empty:
+        return pd.DataFrame(
+            columns=["round", "driver_id", "last_name", "points", "position"]
+        )
+
+    # Running totals across rounds, hiding drivers before their first round
+    round_points = rows.pivot_table(
+        index="round", columns="driver_id", values="points", aggfunc="sum"
+    )
+    cumulative_points = round_points.fillna(0.0).cumsum()
+    first_rounds = rows.groupby("driver_id")["round"].min()[cumulative_points.columns]
+    entered = cumulative_points.index.values[:, None] >= first_rounds.values
+    points = cumulative_points.where(entered).stack()
+
+    # Ties on points are broken by countback: most wins, then most second
+    # places, and so on
+    race_rows = rows[rows["session"] == "race"]
+    finishes = pd.crosstab(
+        [race_rows["round"], race_rows["driver_id"]], race_rows["position"]
+    )
+    finishes = finishes.reindex(points.index, fill_value=0)
+    finishes = finishes.groupby(level="driver_id").cumsum()
+
+    standings_progression = (
+        pd.DataFrame({"points": points})
+        .join(finishes)
+        .reset_index()
+        .sort_values(
+            ["round", "points", *finishes.columns],
+            ascending=[True] + [False] * (len(finishes.columns) + 1),
+        )
+    )
+    standings_progression["position"] = (
+        standings_progression.groupby("round").cumcount() + 1
+    )
+
+    last_names = rows.drop_duplicates("driver_id", keep="last").set_index("driver_id")[
+        "last_name"
+    ]
+    standings_progression["last_name"] = standings_progression["driver_id"].map(
+        last_names
+    )
+    return standings_progression[
+        ["round", "driver_id", "last_name", "points", "position"]
+    ].reset_index(drop=True)
+
+
+class _SeasonPoints:
+    """Race and sprint results of a season, one row per driver per session.
+
+    Ergast pages through results row by row in round order, so the rows we
+    already have tell us the offset to fetch new rows from. Every update
+    fetches the most recent round again, as its results can still change
+    after the race (e.g. stewards' penalties). Once the results of the final
+    round are in and final (see `season_is_final`) the season is not fetched
+    again."""
+
+    COLUMNS = ["round", "driver_id", "last_name", "points", "position", "session"]
+
+    def __init__(self) -> None:
+        self.rows = pd.DataFrame(columns=self.COLUMNS)
+        self.updated_at: Optional[float] = None
+        self.complete = False
+
+    def is_stale(self) -> bool:
+        if self.complete:
+            return False
+        if self.updated_at is None:
+            return True
+        return time.monotonic() - self.updated_at > PROGRESSION_TTL
+
+    def update(self, season: int) -> None:
+        rows = self.rows
+        if not rows.empty:
+            rows = rows[rows["round"] < rows["round"].max()]
+
+        new_rows: list[dict[str, Any]] = []
+        for endpoint, results_key, session in (
+            ("results", "Results", "race"),
+            ("sprint", "SprintResults", "sprint"),
+        ):
+            offset = int((rows["session"] == session).sum())
+            new_rows.extend(
+                self._fetch_rows(season, endpoint, results_key, session, offset)
+            )
+
+        # Only replace the rows once every page has been fetched
+        self.rows = pd.concat(
+            [rows, pd.DataFrame(new_rows, columns=self.COLUMNS)], ignore_index=True
+        )
+        self.updated_at = time.monotonic()
+
+        race_rounds = self.rows.loc[self.rows["session"] == "race", "round"]
+        self.complete = season_is_final(season, set(race_rounds))
+
+    def _fetch_rows(
+        self, season: int, endpoint: str, results_key: str, session: str, offset: int
+    ) -> list[dict[str, Any]]:
+        rows: list[dict[str, Any]] = []
+        while True:
+            url = f"{BASE_URL}/{season}/{endpoint}.json?limit={MAX_PAGE_LIMIT}&offset={offset}"
+
+            response = requests.get(url, timeout=REQUEST_TIMEOUT)
+            data = response.json()["MRData"]
+            races = data["RaceTable"]["Races"]
+
+            page = [
+                {
+                    "round": int(race["round"]),
+                    "driver_id": x["Driver"]["driverId"],
+                    "last_name": x["Driver"]["familyName"],
+                    "points": float(x["points"]),
+                    "position": int(x["position"]),
+                    "session": session,
+                }
+                for race in races
+                for x in race[results_key]
+            ]
+            rows.extend(page)
+            offset += len(page)
+
+            if not page or offset >= int(data["total"]):
+                return rows
+
+
+def season_is_final(season: int, rounds_with_results: set[int]) -> bool:
+    """Check whether the results of a season can no longer change: the final
+    round has results and `FINAL_RESULTS_GRACE_DAYS` have passed since it, so
+    post-race penalties have been applied."""
+    season_info = _fetch_season_info(season)
+    if season_info.empty:
+        return False
+
+    last_race = season_info.loc[season_info["round_number"].idxmax()]
+    if last_race["round_number"] not in rounds_with_results:
+        return False
+
+    grace_period = timedelta(days=FINAL_RESULTS_GRACE_DAYS)
+    return date.fromisoformat(last_race["date"]) + grace_period < date.today()
+
+
+# Before this season only a driver's best results counted towards the
+# championship, so summing every result gives the wrong standings
+LAST_DROPPED_SCORES_SEASON = 1990
+
+# Days after the final race before a season's results are treated as final
+FINAL_RESULTS_GRACE_DAYS = 7
+
+# Seconds before the results of a season that is still running are checked again
+PROGRESSION_TTL = 600.0
+
+# Keep the results of every season we have seen so new rounds can be added
+# on top of them instead of refetching the whole season
+_progression_cache: dict[int, _SeasonPoints] = {}
+_progression_season_locks: dict[int, threading.Lock] = {}
+_progression_lock = threading.Lock()
+
+
 # Season List functions
 def get_season_info(season: int, cols: list[str]) -> pd.DataFrame:
     """Get information about a specific F1 season. This will return
@@ -98,9 +304,17 @@ def get_season_info(season: int, cols: list[str]) -> pd.DataFrame:
     Return:
         pd.DataFrame: a dataframe representing the season inf
     """
+    season_info = _fetch_season_info(season)
+    return season_info[cols]
+
+
+@cached
+def _fetch_season_info(season: int) -> pd.DataFrame:
+    """Fetch every season info column. Column selection happens after the
+    cache so requests for different columns share one cached entry."""
     url = f"{BASE_URL}/{season}.json"
 
-    response = requests.get(url)
+    response = requests.get(url, timeout=REQUEST_TIMEOUT)
     data = response.json()
 
     races = data["MRData"]["RaceTable"]["Races"]
@@ -111,17 +325,15 @@ def get_season_info(season: int, cols: list[str]) -> pd.DataFrame:
     circuit_names = [x["Circuit"]["circuitName"] for x in races]
     countries = [x["Circuit"]["Location"]["country"] for x in races]
 
-    list_mapping = {
-        "round_number": round_numbers,
-        "race_name": race_names,
-        "date": dates,
-        "circuit_name": circuit_names,
-        "country": countries,
-    }
-    season_info_dict = {}
-    for col in cols:
-        season_info_dict[col] = list_mapping[col]
-    season_info = pd.DataFrame(season_info_dict)
+    season_info = pd.DataFrame(
+        {
+            "round_number": round_numbers,
+            "race_name": race_names,
+            "date": dates,
+            "circuit_name": circuit_names,
+            "country": countries,
+        }
+    )
     return season_info
 
 
@@ -150,6 +362,14 @@ def get_driver_information(
     Return:
         pd.DataFrame: a dataframe representing the driver info.
     """
+    driver_info = _fetch_driver_information(season, round)
+    return driver_info[cols]
+
+
+@cached
+def _fetch_driver_information(season: int = 0, round: int = 0) -> pd.DataFrame:
+    """Fetch every driver info column. Column selection happens after the
+    cache so requests for different columns share one cached entry."""
     url = BASE_URL
     if season:
         url += f"/{season}"
@@ -161,7 +381,7 @@ def get_driver_information(
 
     url += "/drivers.json?limit=10000"
 
-    response = requests.get(url)
+    response = requests.get(url, timeout=REQUEST_TIMEOUT)
     data = response.json()
 
     drivers = data["MRData"]["DriverTable"]["Drivers"]
@@ -172,23 +392,21 @@ def get_driver_information(
     date_of_births = [x["dateOfBirth"] for x in drivers]
     nationalities = [x["nationality"] for x in drivers]
 
-    list_mapping = {
-        "driver_id": driver_ids,
-        "first_name": first_names,
-        "last_name": last_names,
-        "date_of_birth": date_of_births,
-        "nationality": nationalities,
-    }
-    driver_info_dict = {}
-    for col in cols:
-        driver_info_dict[col] = list_mapping[col]
-
-    driver_info = pd.DataFrame(driver_info_dict)
+    driver_info = pd.DataFrame(
+        {
+            "driver_id": driver_ids,
+            "first_name": first_names,
+            "last_name": last_names,
+            "date_of_birth": date_of_births,
+            "nationality": nationalities,
+        }
+    )
 
     return driver_info
 
 
 # Race Results functions
+@cached
 def get_race_result(season: int, round: int) -> pd.DataFrame:
     """Get the results of a specific race. It will show the finishing order
     of all the drivers. It will show position, first name, and last name
@@ -201,7 +419,7 @@ def get_race_result(season: int, round: int) -> pd.DataFrame:
     """
     url = f"{BASE_URL}/{season}/{round}/results.json"
 
-    response = requests.get(url)
+    response = requests.get(url, timeout=REQUEST_TIMEOUT)
     data = response.json()
     race_result = data["MRData"]["RaceTable"]["Races"][0]["Results"]
 
@@ -216,6 +434,7 @@ def get_race_result(season: int, round: int) -> pd.DataFrame:
     return race_result
 
 
+@cached
 def driver_season_race_results(season: int, driver_id: str) -> pd.DataFrame:
     """Get the race results for a specific driver for a season.
     It will show round number, race name, starint position,
@@ -232,7 +451,7 @@ def driver_season_race_results(season: int, driver_id: str) -> pd.DataFrame:
     """
     url = f"{BASE_URL}/{season}/drivers/{driver_id}/results.json"
 
-    response = requests.get(url)
+    response = requests.get(url, timeout=REQUEST_TIMEOUT)
     data = response.json()
     race_results = data["MRData"]["RaceTable"]["Races"]
 
@@ -257,6 +476,7 @@ def driver_season_race_results(season: int, driver_id: str) -> pd.DataFrame:
 
 
 # Qualifying Results functions
+@cached
 def get_race_qualifying(season: int, round: int) -> pd.DataFrame:
     """Get the results of a specific qualifying session. It will show the finishing order
     of all the drivers. It will show position, first name, and last name, constructor, q1 time, q2 time, q3 time.
@@ -270,7 +490,7 @@ def get_race_qualifying(season: int, round: int) -> pd.DataFrame:
     """
     url = f"{BASE_URL}/{season}/{round}/qualifying.json"
 
-    response = requests.get(url)
+    response = requests.get(url, timeout=REQUEST_TIMEOUT)
     data = response.json()
     qualifying_result = data["MRData"]["RaceTable"]["Races"][0]["QualifyingResults"]
 
@@ -300,6 +520,7 @@ def get_race_qualifying(season: int, round: int) -> pd.DataFrame:
 f1_data: list[Callable[..., Any]] = [
     get_driver_standings,
     get_constructors_standings,
+    get_standings_progression,
     get_season_info,
     get_driver_information,
     get_race_result,
@@ -1,5 +1,5 @@
 import inspect
-from typing import Any, Callable, get_args, get_origin
+from typing import Any, Callable, Union, get_args, get_origin
 
 import requests
 
@@ -22,6 +22,12 @@ def get_schema_type(type_hint: Any) -> dict[str, Any]:
     if schema_type:
         return {"type": schema_type}
 
+    # Optional[X] parameters are described by the schema of X
+    if get_origin(type_hint) is Union:
+        union_type_hints = [x for x in get_args(type_hint) if x is not type(None)]
+        if len(union_type_hints) == 1:
+            return get_schema_type(union_type_hints[0])
+
     if get_origin(type_hint) is list:
         list_type_hint = get_args(type_hint)[0]
         list_type = SIMPLE_MAPPING.get(list_type_hint)
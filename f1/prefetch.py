@@ -0,0 +1,216 @@
+import functools
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
+from typing import Any, Callable, Optional
+
+import pandas as pd
+
+from f1.cache import CacheKey, function_cache
+
+FollowUp = tuple[str, dict[str, Any]]
+PrefetchRule = Callable[[dict[str, Any], Any, str], list[FollowUp]]
+
+
+def season_info_follow_ups(
+    kwargs: dict[str, Any], response: Any, prompt: str
+) -> list[FollowUp]:
+    """After get_season_info the model almost always asks for the race or
+    qualifying result of one of the rounds. Prefer the rounds named in the
+    question, otherwise guess the most recent round."""
+    if not isinstance(response, pd.DataFrame) or "round_number" not in response:
+        return []
+
+    races = response
+    if "date" in races:
+        # Races that have not happened yet have no results
+        races = races[pd.to_datetime(races["date"]).dt.date <= date.today()]
+    if races.empty:
+        return []
+
+    prompt = prompt.lower()
+    mentioned = pd.Series(False, index=races.index)
+    for col in ("race_name", "circuit_name", "country"):
+        if col in races:
+            mentioned |= races[col].str.lower().map(lambda x: x in prompt)
+    round_numbers = {int(x) for x in re.findall(r"\bround (\d+)", prompt)}
+    mentioned |= races["round_number"].isin(round_numbers)
+
+    if mentioned.any():
+        rounds = sorted(races.loc[mentioned, "round_number"])
+    else:
+        rounds = [races["round_number"].max()]
+
+    season = kwargs["season"]
+    follow_ups: list[FollowUp] = []
+    for round in rounds:
+        round_kwargs = {"season": season, "round": int(round)}
+        follow_ups.append(("get_race_result", round_kwargs))
+        follow_ups.append(("get_race_qualifying", round_kwargs))
+    return follow_ups
+
+
+def driver_information_follow_ups(
+    kwargs: dict[str, Any], response: Any, prompt: str
+) -> list[FollowUp]:
+    """get_driver_information is mostly used to look up a driver_id, which is
+    then passed to driver_season_race_results for the same season. Only the
+    drivers named in the question are prefetched."""
+    season = kwargs.get("season")
+    if not season or not isinstance(response, pd.DataFrame):
+        return []
+    if "driver_id" not in response:
+        return []
+
+    prompt = prompt.lower()
+    mentioned = response["driver_id"].str.lower().map(lambda x: x in prompt)
+    if "last_name" in response:
+        mentioned |= response["last_name"].str.lower().map(lambda x: x in prompt)
+
+    return [
+        ("driver_season_race_results", {"season": season, "driver_id": driver_id})
+        for driver_id in response.loc[mentioned, "driver_id"]
+    ]
+
+
+PREFETCH_RULES: dict[str, PrefetchRule] = {
+    "get_season_info": season_info_follow_ups,
+    "get_driver_information": driver_information_follow_ups,
+}
+
+# Functions the rules can prefetch. Hits and misses are only counted for
+# calls to these functions.
+PREFETCH_TARGETS = {
+    "get_race_result",
+    "get_race_qualifying",
+    "driver_season_race_results",
+}
+
+
+class Prefetcher:
+    """Warm `function_cache` in the background for the calls the model is
+    likely to make next.
+
+    Each call schedules at most `max_per_call` follow-ups, at most
+    `max_workers` fetches run at a time and at most `max_pending` are queued.
+    Any further follow-ups are dropped rather than spending the API rate limit
+    on data that is unlikely to be used."""
+
+    def __init__(
+        self,
+        function_mapping: dict[str, Callable[..., Any]],
+        max_workers: int = 2,
+        max_pending: int = 4,
+        max_per_call: int = 4,
+        rules: dict[str, PrefetchRule] = PREFETCH_RULES,
+        targets: set[str] = PREFETCH_TARGETS,
+    ):
+        self.function_mapping = function_mapping
+        self.rules = rules
+        self.targets = targets
+        self.max_per_call = max_per_call
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="f1-prefetch",
+            initializer=_lower_thread_priority,
+        )
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+
+        # Keys that were prefetched and not yet requested by the model
+        self._prefetched: set[CacheKey] = set()
+
+        self.submitted = 0
+        self.dropped = 0
+        self.failed = 0
+        self.hits = 0
+        self.misses = 0
+
+    def record_call(self, function_name: str, kwargs: dict[str, Any]) -> None:
+        """Track whether a call the model is about to make was prefetched"""
+        if function_name not in self.targets:
+            return
+        key = self._key(function_name, kwargs)
+        if key is None:
+            return
+
+        with self._lock:
+            if key in self._prefetched:
+                self._prefetched.discard(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def observe(
+        self, function_name: str, kwargs: dict[str, Any], response: Any, prompt: str
+    ) -> None:
+        """Schedule the likely follow-ups of a call that just returned"""
+        rule = self.rules.get(function_name)
+        if rule is None:
+            return
+
+        follow_ups = rule(kwargs, response, prompt)[: self.max_per_call]
+        for follow_up_name, follow_up_kwargs in follow_ups:
+            key = self._key(follow_up_name, follow_up_kwargs)
+            if key is None or key in function_cache:
+                continue
+            with self._lock:
+                if key in self._prefetched:
+                    continue
+
+            if not self._slots.acquire(blocking=False):
+                with self._lock:
+                    self.dropped += 1
+                continue
+
+            with self._lock:
+                self._prefetched.add(key)
+                self.submitted += 1
+
+            future = self._executor.submit(
+                self.function_mapping[follow_up_name], **follow_up_kwargs
+            )
+            future.add_done_callback(functools.partial(self._on_done, key=key))
+
+    def metrics(self) -> dict[str, Any]:
+        with self._lock:
+            requested = self.hits + self.misses
+            return {
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requested if requested else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _on_done(self, future: Future, key: CacheKey) -> None:
+        self._slots.release()
+        if future.cancelled() or future.exception() is not None:
+            with self._lock:
+                self._prefetched.discard(key)
+                self.failed += 1
+
+    def _key(self, function_name: str, kwargs: dict[str, Any]) -> Optional[CacheKey]:
+        func = self.function_mapping.get(function_name)
+        if func is None:
+            return None
+        try:
+            return function_cache.key(func, (), kwargs)
+        except TypeError:
+            # Bad arguments from the model, the call itself will fail
+            return None
+
+
+def _lower_thread_priority() -> None:
+    """Run prefetch threads at a lower scheduling priority than the request
+    thread. Linux applies niceness per thread, elsewhere this is a no-op."""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except (AttributeError, OSError):
+        pass
@@ -25,23 +25,41 @@ of that race.
 If you need to know the driver_id of a driver, you can call get_driver_information
 to retrieve driver_ids.
 
+Every dataframe returned by a function is given a handle (e.g. "df1"). Pass handles
+to data_analysis, create_chart, or join_dataframes to work with data you have already
+fetched instead of fetching it again.
+
 Today is {date.today()}
 
 Here is some information about the most recent race:
 {most_recent_race}
 """
 
+FAST_ANSWERS_CONTENT = """
+Some functions have a `final_answer` parameter. If the question is a simple lookup
+that the result of that single call answers completely (e.g. who won a race, or the
+current standings), set `final_answer` to true and the result will be shown to the
+user directly. Otherwise leave it out.
+"""
+
+
+def system_content(fast_answers: bool) -> str:
+    if fast_answers:
+        return SYSTEM_CONTENT + FAST_ANSWERS_CONTENT
+    return SYSTEM_CONTENT
+
 
-def response_too_long_prompt(function_name: str, df: pd.DataFrame):
+def response_too_long_prompt(function_name: str, df: pd.DataFrame, handle: str):
     num_rows, num_columns = df.shape
     df_head = df.head()
-    return f"""The function {function_name} returned a pandas dataframe.
+    return f"""The function {function_name} returned a pandas dataframe
+with the handle "{handle}".
 
 The dataframe has {num_rows} rows and {num_columns} columns.
 This is the metadata of the dataframe:
 {df_head}.
 
-This dataframe was too long to return, but the ask_pandasai function
-has access to this dataframe. Call ask_pandasai with the appropriate prompt
-to get a result to return to the user.
+This dataframe was too long to return, but the data_analysis function
+has access to this dataframe. Call data_analysis with the appropriate prompt
+and handle to get a result to return to the user.
 """
@@ -0,0 +1,62 @@
+from collections import OrderedDict
+
+import pandas as pd
+
+
+class DataFrameRegistry:
+    """Keeps the dataframes returned by functions under short handles
+    ("df1", "df2", ...) so GPT can refer back to any of them.
+
+    Least recently used dataframes are evicted once the total deep memory
+    usage goes over `max_bytes`. The most recently added dataframe is always
+    kept, even if it is larger than the limit on its own."""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._dataframes: OrderedDict[str, pd.DataFrame] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        self._counter = 0
+
+    def add(self, df: pd.DataFrame) -> str:
+        self._counter += 1
+        handle = f"df{self._counter}"
+
+        self._dataframes[handle] = df
+        self._sizes[handle] = int(df.memory_usage(deep=True).sum())
+        self._evict()
+        return handle
+
+    def get(self, handle: str = "") -> pd.DataFrame:
+        """Get the dataframe for a handle. An empty handle returns the most
+        recently added dataframe."""
+        if not handle:
+            handle = self.latest_handle
+        if handle not in self._dataframes:
+            raise RuntimeError(f"No dataframe with handle: {handle}")
+
+        self._dataframes.move_to_end(handle)
+        return self._dataframes[handle]
+
+    @property
+    def latest_handle(self) -> str:
+        if self._counter == 0:
+            raise RuntimeError("No dataframe has been returned yet")
+        return f"df{self._counter}"
+
+    @property
+    def handles(self) -> list[str]:
+        return list(self._dataframes)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def _evict(self) -> None:
+        latest = self.latest_handle
+        while self.total_bytes > self.max_bytes and len(self._dataframes) > 1:
+            handle = next(iter(self._dataframes))
+            if handle == latest:
+                self._dataframes.move_to_end(handle)
+                continue
+            del self._dataframes[handle]
+            del self._sizes[handle]
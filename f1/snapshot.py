@@ -0,0 +1,348 @@
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timezone
+from typing import Any, Callable
+
+import pandas as pd
+import pyarrow as pa
+import requests
+
+from f1 import functions
+from f1.cache import CacheKey, function_cache
+
+SNAPSHOT_VERSION = 1
+
+# Attempts for each call during a build, waiting RETRY_BACKOFF seconds after
+# the first failure and doubling the wait after each one after that
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 2.0
+
+# Kinds of entries stored in a snapshot
+FUNCTION_RESULT = "function_result"
+SEASON_POINTS = "season_points"
+
+# Paths of the snapshots loaded by this process
+_loaded_snapshots: set[str] = set()
+
+
+def build_snapshot(start: int, end: int, path: str) -> dict[str, Any]:
+    """Call every F1 data function for each season from `start` to `end` and
+    write the parsed results to an Arrow IPC file at `path`."""
+    started = time.perf_counter()
+
+    # Keep everything fetched during the build in the cache. A long build can
+    # take much longer than the cache TTL, so entries must not expire either
+    maxsize, ttl, current_season_ttl = (
+        function_cache.maxsize,
+        function_cache.ttl,
+        function_cache.current_season_ttl,
+    )
+    function_cache.maxsize = sys.maxsize
+    function_cache.ttl = function_cache.current_season_ttl = None
+    function_cache.clear()
+    try:
+        failures: list[str] = []
+        complete_seasons = [
+            season for season in range(start, end + 1) if _walk_season(season, failures)
+        ]
+        table = _snapshot_table(start, end, complete_seasons)
+    finally:
+        function_cache.maxsize = maxsize
+        function_cache.ttl = ttl
+        function_cache.current_season_ttl = current_season_ttl
+
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    return {
+        "entries": table.num_rows,
+        "complete_seasons": complete_seasons,
+        "failures": failures,
+        "size_bytes": os.path.getsize(path),
+        "build_seconds": time.perf_counter() - started,
+    }
+
+
+def load_snapshot(path: str) -> dict[str, Any]:
+    """Memory-map a snapshot and add its entries to the cache.
+
+    Entries are only turned into dataframes the first time they are requested,
+    so the pages of the file are shared by every process that loads it. For a
+    season that was still in progress when the snapshot was built, only the
+    entries for a specific round are used; season wide results are fetched
+    live, and the standings progression only fetches the rounds after the
+    snapshot."""
+    path = os.path.abspath(path)
+    if path in _loaded_snapshots:
+        return {}
+
+    started = time.perf_counter()
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    metadata = json.loads(table.schema.metadata[b"f1_snapshot"])
+    if metadata["version"] != SNAPSHOT_VERSION:
+        raise RuntimeError(f"Unsupported snapshot version: {metadata['version']}")
+    complete_seasons = set(metadata["complete_seasons"])
+
+    kinds = table.column("kind").to_pylist()
+    keys = table.column("key").to_pylist()
+    seasons = table.column("season").to_pylist()
+    payloads = table.column("payload")
+
+    # Entries of a running season are only used if they are for a single
+    # round. The latest of those rounds can still change, so it expires like
+    # any other current season entry, the earlier rounds are kept.
+    entries: list[tuple[str, str, int, pa.Buffer]] = []
+    latest_rounds: dict[int, int] = {}
+    for i, (kind, encoded_key, season) in enumerate(zip(kinds, keys, seasons)):
+        if kind == FUNCTION_RESULT and season not in complete_seasons:
+            round = _round(_decode_key(encoded_key))
+            if not round:
+                continue
+            latest_rounds[season] = max(latest_rounds.get(season, 0), round)
+        entries.append((kind, encoded_key, season, payloads[i].as_buffer()))
+
+    # Make room for the snapshot on top of what the cache normally holds, before
+    # adding any of it so no entry is evicted by the ones after it
+    function_cache.maxsize += len(entries)
+
+    cache_keys: list[CacheKey] = []
+    for kind, encoded_key, season, payload in entries:
+        if kind == SEASON_POINTS:
+            # Seasons that were final when the snapshot was built are never
+            # fetched again, the others only fetch rounds from the last one on
+            season_points = _read_season_points(payload)
+            season_points.complete = season in complete_seasons
+            functions._progression_cache.setdefault(season, season_points)
+            continue
+
+        key = _decode_key(encoded_key)
+        is_latest_round = (
+            season not in complete_seasons and _round(key) == latest_rounds[season]
+        )
+        function_cache.put_lazy(
+            key,
+            functools.partial(_read_dataframe, payload),
+            # A negative ttl uses the cache default for the key
+            ttl=-1.0 if is_latest_round else None,
+        )
+        cache_keys.append(key)
+
+    _loaded_snapshots.add(path)
+
+    cached = sum(key in function_cache for key in cache_keys)
+    return {
+        "entries": cached + len(entries) - len(cache_keys),
+        "skipped": table.num_rows - len(entries),
+        "built_at": metadata["built_at"],
+        "size_bytes": os.path.getsize(path),
+        "load_seconds": time.perf_counter() - started,
+    }
+
+
+def _walk_season(season: int, failures: list[str]) -> bool:
+    """Fetch everything for a season. Returns whether the season's results are
+    final (see `functions.season_is_final`)."""
+    today = date.today().isoformat()
+    season_info = _try(
+        functions.get_season_info, season, ["round_number", "date"], failures=failures
+    )
+    if season_info is None:
+        return False
+
+    _try(functions.get_driver_standings, season, failures=failures)
+    _try(functions.get_constructors_standings, season, failures=failures)
+    if season > functions.LAST_DROPPED_SCORES_SEASON:
+        _try(functions.get_standings_progression, season, failures=failures)
+
+    driver_info = _try(
+        functions.get_driver_information, ["driver_id"], season, failures=failures
+    )
+    if driver_info is not None:
+        for driver_id in driver_info["driver_id"]:
+            _try(
+                functions.driver_season_race_results,
+                season,
+                driver_id,
+                failures=failures,
+            )
+
+    rounds_with_results = set()
+    for round, race_date in zip(season_info["round_number"], season_info["date"]):
+        if race_date > today:
+            continue
+        round = int(round)
+        if (
+            _try(functions.get_race_result, season, round, failures=failures)
+            is not None
+        ):
+            rounds_with_results.add(round)
+        _try(functions.get_race_qualifying, season, round, failures=failures)
+        _try(functions.get_driver_standings, season, round, failures=failures)
+        _try(functions.get_constructors_standings, season, round, failures=failures)
+        _try(
+            functions.get_driver_information,
+            ["driver_id"],
+            season,
+            round,
+            failures=failures,
+        )
+
+    return functions.season_is_final(season, rounds_with_results)
+
+
+def _try(func: Callable[..., Any], *args: Any, failures: list[str]) -> Any:
+    """Call a function, retrying with backoff when the request fails.
+
+    Data that does not exist for a round (e.g. qualifying results of older
+    seasons) is skipped. Calls that still fail after `MAX_ATTEMPTS` are added
+    to `failures` instead of stopping the build. Returns None if the call did
+    not succeed."""
+    call = f"{func.__name__}{args}"
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            return func(*args)
+        except (IndexError, KeyError):
+            print(f"No data for {call}, skipping")
+            return None
+        except (requests.RequestException, ValueError) as e:
+            if attempt == MAX_ATTEMPTS:
+                print(f"Failed {call} after {attempt} attempts: {e}")
+                failures.append(call)
+                return None
+            time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+
+
+def _snapshot_table(start: int, end: int, complete_seasons: list[int]) -> pa.Table:
+    kinds, keys, seasons, payloads = [], [], [], []
+
+    for key in function_cache.keys():
+        hit, df = function_cache.get(key)
+        if not hit or not isinstance(df, pd.DataFrame):
+            continue
+        kinds.append(FUNCTION_RESULT)
+        keys.append(_encode_key(key))
+        season = dict(key[1]).get("season", 0)
+        seasons.append(season if isinstance(season, int) else 0)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        payloads.append(_write_table(table))
+
+    for season, season_points in functions._progression_cache.items():
+        if not start <= season <= end:
+            continue
+        kinds.append(SEASON_POINTS)
+        keys.append("")
+        seasons.append(season)
+        payloads.append(_write_season_points(season_points))
+
+    metadata = {
+        "version": SNAPSHOT_VERSION,
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "seasons": [start, end],
+        "complete_seasons": complete_seasons,
+    }
+    table = pa.table(
+        {
+            "kind": pa.array(kinds, pa.string()),
+            "key": pa.array(keys, pa.string()),
+            "season": pa.array(seasons, pa.int32()),
+            "payload": pa.array(payloads, pa.binary()),
+        }
+    )
+    return table.replace_schema_metadata({"f1_snapshot": json.dumps(metadata)})
+
+
+def _round(key: CacheKey) -> int:
+    """The round of a key, 0 for keys that cover a whole season"""
+    round = dict(key[1]).get("round", 0)
+    return round if isinstance(round, int) else 0
+
+
+def _encode_key(key: CacheKey) -> str:
+    function_name, arguments = key
+    return json.dumps(
+        [
+            function_name,
+            [[k, list(v) if isinstance(v, tuple) else v] for k, v in arguments],
+        ]
+    )
+
+
+def _decode_key(encoded_key: str) -> CacheKey:
+    function_name, arguments = json.loads(encoded_key)
+    return function_name, tuple(
+        (k, tuple(v) if isinstance(v, list) else v) for k, v in arguments
+    )
+
+
+def _write_table(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _read_dataframe(payload: pa.Buffer) -> pd.DataFrame:
+    return pa.ipc.open_stream(payload).read_all().to_pandas()
+
+
+def _write_season_points(season_points: functions._SeasonPoints) -> bytes:
+    table = pa.Table.from_pandas(season_points.rows, preserve_index=False)
+    return _write_table(table)
+
+
+def _read_season_points(payload: pa.Buffer) -> functions._SeasonPoints:
+    season_points = functions._SeasonPoints()
+    season_points.rows = _read_dataframe(payload)
+    return season_points
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Build or inspect snapshots of parsed F1 data"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Build a snapshot")
+    build_parser.add_argument("--start", type=int, required=True)
+    build_parser.add_argument("--end", type=int, default=date.today().year)
+    build_parser.add_argument("--output", default="f1_snapshot.arrow")
+
+    info_parser = subparsers.add_parser(
+        "info", help="Load a snapshot and report its cold start latency"
+    )
+    info_parser.add_argument("path")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        stats = build_snapshot(args.start, args.end, args.output)
+        print(f"Wrote {stats['entries']} entries to {args.output}")
+        print(f"Complete seasons: {stats['complete_seasons']}")
+        print(f"Failed calls: {len(stats['failures'])}")
+        for failure in stats["failures"]:
+            print(f"  {failure}")
+        print(f"Snapshot size: {stats['size_bytes'] / 1024:.1f} KiB")
+        print(f"Build time: {stats['build_seconds']:.1f}s")
+    else:
+        stats = load_snapshot(args.path)
+        print(f"Snapshot built at {stats['built_at']}")
+        print(f"Loaded {stats['entries']} entries, skipped {stats['skipped']}")
+        print(f"Snapshot size: {stats['size_bytes'] / 1024:.1f} KiB")
+        print(f"Load time: {stats['load_seconds'] * 1000:.1f}ms")
+
+        # The first lookup of an entry builds its dataframe from the mapped file
+        keys = function_cache.keys()
+        if keys:
+            started = time.perf_counter()
+            function_cache.get(keys[0])
+            lookup_ms = (time.perf_counter() - started) * 1000
+            print(f"First lookup ({keys[0][0]}): {lookup_ms:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
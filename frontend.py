@@ -6,13 +6,23 @@ from PIL import Image
 
 from f1.ai import FormulaOneAI
 from f1.functions import f1_data
+from f1.snapshot import load_snapshot
 from streamlit_helpers import get_directories, get_png_files
 
 load_dotenv()
 
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
-f1_ai = FormulaOneAI(openai_api_key, f1_data)
+# Serve data from a prebuilt snapshot if there is one. This only loads once per process
+snapshot_path = os.getenv("F1_SNAPSHOT_PATH")
+if snapshot_path and os.path.isfile(snapshot_path):
+    load_snapshot(snapshot_path)
+
+# Streamlit reruns this script on every interaction, so keep one FormulaOneAI
+# per session to keep its state (e.g. round trips saved) between questions
+if "f1_ai" not in st.session_state:
+    st.session_state.f1_ai = FormulaOneAI(openai_api_key, f1_data, fast_answers=True)
+f1_ai = st.session_state.f1_ai
 
 st.title("Formula One AI")
 
@@ -63,6 +73,9 @@ if f1_ai.executed_functions:
         executed_funcs_md += f"- {f}\n"
     st.markdown(executed_funcs_md)
 
+if f1_ai.round_trips_saved:
+    st.metric("Round trips saved by templated answers", f1_ai.round_trips_saved)
+
 if f1_ai.messages:
     st.write("---")
     st.markdown("# Messages:")